@@ -0,0 +1,198 @@
+"""
+Microbenchmarks for the server hot paths.
+
+Handlers run against a stub Socket.IO server, without sockets, at several
+room and player counts. Results are compared with baseline.json and the run
+fails when a benchmark is slower than its baseline by more than the allowed
+threshold. Timings are only comparable on the machine and Python version the
+baseline was recorded with; anywhere else the comparison is printed but never
+fails.
+
+    python benchmarks/hot_paths.py                    # compare with the baseline
+    python benchmarks/hot_paths.py --output out.json  # also write the results
+    python benchmarks/hot_paths.py --update-baseline  # record a new baseline
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from stub_server import StubServer, disable_rate_limits, reset_game_states
+from services import lobby, movement
+from storage.game_states import rooms
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 1.25  # Fail when more than 25% slower than the baseline
+# Calls this short are dominated by timer and interpreter noise
+FAST_BENCHMARK_US = 10
+FAST_BENCHMARK_THRESHOLD = 2.0
+
+# (rooms, players per room)
+SCALES = [(10, 8), (1000, 8)]
+
+MIN_REPEAT_TIME = 0.02  # Seconds per repeat, the loop count is calibrated to reach it
+REPEATS = 15
+
+
+def populate(sio, num_rooms, players_per_room, started=True):
+    """Fill the lobby through the real handlers, returns the sids of every room"""
+    handlers = sio.handlers
+    room_sids = []
+    for room_index in range(num_rooms):
+        room_name = f'room-{room_index}'
+        sids = [f'sid-{room_index}-{slot}' for slot in range(players_per_room)]
+        for slot, sid in enumerate(sids):
+            handlers['connect'](sid, {})
+            if slot == 0:
+                handlers['create_room'](sid, {'room_name': room_name, 'username': sid})
+            else:
+                handlers['join_room'](sid, {'room_name': room_name, 'username': sid})
+        if started:
+            handlers['start_game'](sids[0], {})
+        room_sids.append(sids)
+    return room_sids
+
+
+def time_call(fn):
+    """Median time per call over REPEATS runs, in microseconds"""
+    fn()  # Warm up caches and lazily built state
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_REPEAT_TIME:
+            break
+        loops *= 10 if elapsed < MIN_REPEAT_TIME / 10 else 2
+
+    timings = [elapsed]
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / loops * 1e6
+
+
+def bench_scale(num_rooms, players_per_room):
+    reset_game_states()
+    sio = StubServer()
+    lobby.register_lobby_events(sio)
+    movement.register_movement_events(sio)
+    room_sids = populate(sio, num_rooms, players_per_room)
+
+    first_room = 'room-0'
+    mover = room_sids[0][-1]
+    position = {'x': 100, 'y': 200}
+    update_position = sio.handlers['update_position']
+    list_rooms = sio.handlers['list_rooms']
+
+    return {
+        'get_room_game_state': lambda: movement.get_room_game_state(first_room),
+        'broadcast_games_state': lambda: movement.broadcast_games_state(sio),
+        'update_position': lambda: update_position(mover, position),
+        'get_player_list': lambda: lobby.get_player_list(rooms[first_room]),
+        'list_rooms': lambda: list_rooms(mover),
+        'cleanup_inactive_rooms': lobby.cleanup_inactive_rooms,
+    }
+
+
+def run_benchmarks():
+    results = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results['generate_walls'] = {'us_per_call': time_call(lobby.generate_walls)}
+
+        for num_rooms, players_per_room in SCALES:
+            benchmarks = bench_scale(num_rooms, players_per_room)
+            for name, fn in benchmarks.items():
+                results[f'{name}[{num_rooms}x{players_per_room}]'] = {
+                    'us_per_call': time_call(fn),
+                    'rooms': num_rooms,
+                    'players_per_room': players_per_room,
+                }
+        reset_game_states()
+    return results
+
+
+def get_threshold(name, expected_us, baseline):
+    if name in baseline['thresholds']:
+        return baseline['thresholds'][name]
+    if expected_us < baseline['fast_benchmark_us']:
+        return baseline['fast_benchmark_threshold']
+    return baseline['default_threshold']
+
+
+def compare_with_baseline(results, baseline):
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f"{'benchmark':<48} {'us/call':>12} {'baseline':>12} {'ratio':>8}")
+    for name, result in results.items():
+        expected = baseline['results'].get(name)
+        if expected is None:
+            print(f"{name:<48} {result['us_per_call']:>12.2f} {'-':>12} {'new':>8}")
+            continue
+        ratio = result['us_per_call'] / expected['us_per_call']
+        threshold = get_threshold(name, expected['us_per_call'], baseline)
+        regressed = ratio > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<48} {result['us_per_call']:>12.2f} {expected['us_per_call']:>12.2f} "
+              f"{ratio:>7.2f}x{' REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    parser.add_argument('--update-baseline', action='store_true', help='overwrite baseline.json with this run')
+    args = parser.parse_args()
+
+    disable_rate_limits()
+    results = run_benchmarks()
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        # Keep any hand-tuned thresholds from the previous baseline
+        previous = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                previous = json.load(f)
+        report['default_threshold'] = previous.get('default_threshold', DEFAULT_THRESHOLD)
+        report['fast_benchmark_us'] = previous.get('fast_benchmark_us', FAST_BENCHMARK_US)
+        report['fast_benchmark_threshold'] = previous.get('fast_benchmark_threshold', FAST_BENCHMARK_THRESHOLD)
+        report['thresholds'] = previous.get('thresholds', {})
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline)
+    if (baseline['python'], baseline['machine']) != (report['python'], report['machine']):
+        print(f"Baseline was recorded on Python {baseline['python']} ({baseline['machine']}), "
+              f"this run is Python {report['python']} ({report['machine']}): "
+              f"not failing on regressions, record a local baseline with --update-baseline")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed past their threshold: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
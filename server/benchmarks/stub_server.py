@@ -0,0 +1,67 @@
+"""
+Socket.IO server stand-in for benchmarks: handlers are registered and called
+directly, emits are counted and dropped. Room membership is only tracked when
+asked for, so it never shows up in timings or memory measurements.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from services import rate_limit
+from storage import game_states
+
+
+class StubServer:
+    def __init__(self, track_rooms=False):
+        self.handlers = {}
+        self.emitted = 0
+        self.room_members = {} if track_rooms else None
+
+    def event(self, handler):
+        self.handlers[handler.__name__] = handler
+        return handler
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def enter_room(self, sid, room):
+        if self.room_members is not None:
+            self.room_members.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room):
+        if self.room_members is None:
+            return
+        members = self.room_members.get(room)
+        if members is not None:
+            members.discard(sid)
+            if not members:
+                del self.room_members[room]
+
+    def emit(self, event, data=None, room=None):
+        self.emitted += 1
+
+    def sleep(self, seconds=0):
+        pass
+
+    def disconnect(self, sid):
+        self.handlers['disconnect'](sid)
+
+
+def disable_rate_limits():
+    """Keep the limiter in the call path but never drop, call before registering handlers"""
+    unlimited = (float('inf'), float('inf'))
+    rate_limit.DEFAULT_RATE_LIMIT = unlimited
+    for event in rate_limit.RATE_LIMITS:
+        rate_limit.RATE_LIMITS[event] = unlimited
+
+def reset_game_states():
+    for room_name in list(game_states.rooms):
+        game_states.open_rooms.remove(room_name)
+        game_states.unmark_room_started(room_name)
+    game_states.players.clear()
+    game_states.rooms.clear()
+    game_states.active_room_names.clear()
+    game_states.rate_limit_buckets.clear()
+    game_states.abandoned_rooms.clear()
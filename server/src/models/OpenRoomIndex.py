@@ -0,0 +1,31 @@
+class OpenRoomIndex:
+  """Joinable rooms bucketed by free slot count for constant-time quick join"""
+  __buckets: list[dict[str, None]]
+  __free_slots: dict[str, int]
+  
+  def __init__(self):
+    # Bucket i holds the rooms with exactly i free slots, dicts keep insertion order
+    self.__buckets = []
+    self.__free_slots = {}
+  
+  def update(self, room_name: str, free_slots: int):
+    self.remove(room_name)
+    if free_slots <= 0:
+      return
+    
+    while len(self.__buckets) <= free_slots:
+      self.__buckets.append({})
+    self.__buckets[free_slots][room_name] = None
+    self.__free_slots[room_name] = free_slots
+  
+  def remove(self, room_name: str):
+    free_slots = self.__free_slots.pop(room_name, None)
+    if free_slots is not None:
+      del self.__buckets[free_slots][room_name]
+  
+  def find_room(self):
+    """Return the open room with the fewest free slots, oldest first"""
+    for bucket in self.__buckets[1:]:
+      if bucket:
+        return next(iter(bucket))
+    return None
@@ -6,10 +6,12 @@ class Player:
   username: str
   color: str
   room: str
+  spectating: str
   
   def __init__(self, sid: str, position: Vec2):
     self.sid = sid
     self.position = position
     self.username = None
     self.color = None
-    self.room = None    
\ No newline at end of file
+    self.room = None
+    self.spectating = None    
\ No newline at end of file
@@ -1,83 +1,148 @@
 import time
 
 class Room:
-  __players: list[str]
-  __players_in_room: dict[str, bool]
-  
+  # Lobbies are created in bulk and mostly sit idle, so rooms keep no
+  # per-instance dict: membership is a seat list indexed by player slot,
+  # activity is a bitmask over the same slots, counts are maintained.
+  __slots__ = (
+    '__seats', '__active_seats', '__num_players', '__num_active_players',
+    '__hostSid', '__spectators', '__walls', '__game_started', '__created_at',
+  )
+
+  __seats: list
+  __active_seats: int
+  __num_players: int
+  __num_active_players: int
+
   __hostSid: str
-  
+  __spectators: set
+
   __walls: list
   __game_started: bool
   __created_at: float
-  
+
   def __init__(self, walls, host_sid):
-    self.__players = [host_sid]
-    self.__players_in_room = {host_sid: True}    
-    
+    self.__seats = [host_sid]
+    self.__active_seats = 1
+    self.__num_players = 1
+    self.__num_active_players = 1
+
     self.__hostSid = host_sid
-    
+    self.__spectators = None  # Created on the first spectator
+
+    # Shared between rooms, never mutated
     self.__walls = walls
     self.__game_started = False
     self.__created_at = time.time()
-  
+
   def get_walls(self):
     return self.__walls
-  
+
   def get_players(self):
-    return self.__players
-  
+    return [sid for sid in self.__seats if sid is not None]
+
+  def get_seats(self):
+    """Player sids indexed by slot, None for a free slot"""
+    return self.__seats
+
+  def get_seat(self, sid: str):
+    if sid is None or sid not in self.__seats:
+      return None
+    return self.__seats.index(sid)
+
+  def get_free_seat(self):
+    """Lowest free slot, reusing the slots of players that left"""
+    if self.__num_players == len(self.__seats):
+      return len(self.__seats)
+    return self.__seats.index(None)
+
   def add_player(self, sid: str):
-    self.__players.append(sid)
-    self.__players_in_room[sid] = True
+    seat = self.get_free_seat()
+    if seat == len(self.__seats):
+      self.__seats.append(sid)
+    else:
+      self.__seats[seat] = sid
+    self.__active_seats |= 1 << seat
+    self.__num_players += 1
+    self.__num_active_players += 1
+    return seat
 
   def remove_player(self, sid: str):
-    if sid not in self.__players_in_room:
+    seat = self.get_seat(sid)
+    if seat is None:
       return
-    
-    self.__players.remove(sid)
-    del self.__players_in_room[sid]
-    
-    # If the player is the host, remove the room
+
+    if self.__active_seats & (1 << seat):
+      self.__active_seats &= ~(1 << seat)
+      self.__num_active_players -= 1
+    self.__seats[seat] = None
+    self.__num_players -= 1
+    while self.__seats and self.__seats[-1] is None:
+      self.__seats.pop()
+
+    # If the player is the host, hand the room to the first active player
     if sid == self.__hostSid:
       self.__hostSid = None
-      for player_sid in self.__players:
-        if self.__players_in_room[player_sid]:
+      for i, player_sid in enumerate(self.__seats):
+        if player_sid is not None and self.__active_seats & (1 << i):
           self.__hostSid = player_sid
           break
-        
+
   def is_player_in_room(self, sid: str):
-    return sid in self.__players_in_room
-      
+    return sid is not None and sid in self.__seats
+
   def activate_player(self, sid: str):
-    if sid not in self.__players:
+    seat = self.get_seat(sid)
+    if seat is None or self.__active_seats & (1 << seat):
       return
-    self.__players_in_room[sid] = True
+    self.__active_seats |= 1 << seat
+    self.__num_active_players += 1
 
   def deactivate_player(self, sid: str):
-    if sid not in self.__players:
+    seat = self.get_seat(sid)
+    if seat is None or not self.__active_seats & (1 << seat):
       return
-    self.__players_in_room[sid] = False
-
-  def is_player_activated(self, sid: str):
-    return sid in self.__players_in_room and self.__players_in_room[sid]
-  
-  def get_num_players(self):  
-    return len(self.__players)
-  
+    self.__active_seats &= ~(1 << seat)
+    self.__num_active_players -= 1
+
+  def is_seat_activated(self, seat: int):
+    return bool(self.__active_seats & (1 << seat))
+
+  def get_num_players(self):
+    return self.__num_players
+
   def get_num_active_players(self):
-    return len([sid for sid in self.__players if self.__players_in_room[sid]])
-  
+    return self.__num_active_players
+
   def is_empty(self):
-    return len(self.__players) == 0
-    
+    return self.__num_players == 0
+
   def get_hostSid(self):
-    return self.__hostSid  
-  
+    return self.__hostSid
+
   def start_game(self):
     self.__game_started = True
-    
+
   def is_game_started(self):
     return self.__game_started
-  
+
   def get_creation_time(self):
-    return self.__created_at
\ No newline at end of file
+    return self.__created_at
+
+  def add_spectator(self, sid: str):
+    if self.__spectators is None:
+      self.__spectators = set()
+    self.__spectators.add(sid)
+
+  def remove_spectator(self, sid: str):
+    if self.__spectators is not None:
+      self.__spectators.discard(sid)
+
+  def get_spectators(self):
+    return list(self.__spectators) if self.__spectators else []
+
+  def has_spectators(self):
+    return bool(self.__spectators)
+
+  def get_num_spectators(self):
+    return len(self.__spectators) if self.__spectators else 0
@@ -8,29 +8,65 @@ This server implements a push-based multiplayer model:
 - This ensures all clients have the same view of the game state at all times
 """
 
+import os
+import socket
+import time
+
 import eventlet
 from eventlet import wsgi
 import socketio
 
-sio = socketio.Server(cors_allowed_origins='*')
+# Capacity settings; past these limits new work is rejected up front
+# instead of slowing down every connection already being served
+LISTEN_BACKLOG = int(os.environ.get('LISTEN_BACKLOG', 1024))  # Pending TCP connections queued by the kernel
+WSGI_POOL_SIZE = int(os.environ.get('WSGI_POOL_SIZE', 12000))  # Greenthreads, one per open websocket
+SOCKET_TIMEOUT = 60  # Seconds of silence before a socket is dropped, above the ping interval + timeout
+TCP_KEEPALIVE_IDLE = 30  # Seconds before the kernel probes an idle connection
+
+# Websocket only: long-polling costs a request (and a greenthread) per
+# message and lets a slow client hold server resources between polls
+sio = socketio.Server(
+    cors_allowed_origins='*',
+    transports=['websocket'],
+    ping_interval=25,
+    ping_timeout=20,
+)
 app = socketio.WSGIApp(sio)
 
 from services import (
     lobby,
     movement
 )
-
-lobby.register_lobby_events(sio)
-movement.register_movement_events(sio)
-
-# Create a Socket.IO server
+from services.recorder import MatchRecorder
+from services.rate_limit import rate_limited_event
+from services.scheduling import Lane, report_lanes
 
 # Room cleanup settings
 ROOM_CLEANUP_INTERVAL = 60 * 60  # Clean up old empty rooms after 1 hour
 FPS = 60  # Frames per second for game updates
 UPDATE_PLAYERS_INTERVAL = 1 / FPS  # Update players every 100ms
+SPECTATOR_FPS = 10  # Spectators get a lower-rate stream than players
+UPDATE_SPECTATORS_INTERVAL = 1 / SPECTATOR_FPS
+
+# Scheduling lanes: ticks yield between rooms after their time slice and report
+# how late they start, lobby RPCs only measure their own run time (not the wait
+# behind a tick), housekeeping yields most often
+LANE_REPORT_INTERVAL = 60  # Print lane statistics every minute
+tick_lane = Lane('tick', budget=UPDATE_PLAYERS_INTERVAL, time_slice=0.002)
+spectator_lane = Lane('spectator', budget=UPDATE_SPECTATORS_INTERVAL, time_slice=0.002)
+lobby_lane = Lane('lobby', budget=0.05)
+housekeeping_lane = Lane('housekeeping', budget=1.0, time_slice=0.001)
+lanes = (tick_lane, spectator_lane, lobby_lane, housekeeping_lane)
+
+lobby.register_lobby_events(sio, lobby_lane)
+movement.register_movement_events(sio)
+
+# Match recording is enabled by pointing this at a writable directory
+MATCH_RECORDINGS_DIR = os.environ.get('MATCH_RECORDINGS_DIR')
+recorder = MatchRecorder(MATCH_RECORDINGS_DIR) if MATCH_RECORDINGS_DIR else None
 
-@sio.event
+@rate_limited_event(sio)
+@lobby_lane.wrap
 def ping(sid, data):
     """Respond to ping requests from clients"""
     # Simply respond to the event, client will calculate ping based on round-trip time
@@ -41,20 +77,80 @@ def start_cleanup_task():
     """Start the periodic room cleanup task"""
     while True:
         eventlet.sleep(ROOM_CLEANUP_INTERVAL)
-        lobby.cleanup_inactive_rooms()
+        housekeeping_lane.run(lobby.cleanup_inactive_rooms, sio, housekeeping_lane)
+
+def start_lane_report_task():
+    """Start the periodic scheduling lane report"""
+    while True:
+        eventlet.sleep(LANE_REPORT_INTERVAL)
+        report_lanes(lanes)
+
+def run_at_fixed_rate(interval, lane, fn, *args):
+    """Call fn every interval seconds in a lane, without drifting by its run time"""
+    next_run = time.perf_counter()
+    while True:
+        # When a run overshoots, start the next one right after a yield
+        next_run = max(next_run + interval, time.perf_counter())
+        eventlet.sleep(next_run - time.perf_counter())
+        # Other lanes holding the hub delay the run, which its run time alone hides
+        lane.record_lateness(time.perf_counter() - next_run)
+        lane.run(fn, *args)
 
 def start_update_players_task():
     """Start the periodic player update task"""
-    while True:
-        eventlet.sleep(UPDATE_PLAYERS_INTERVAL)
-        movement.broadcast_games_state(sio)
+    run_at_fixed_rate(UPDATE_PLAYERS_INTERVAL, tick_lane,
+                      movement.broadcast_games_state, sio, recorder, tick_lane)
+
+def start_update_spectators_task():
+    """Start the periodic spectator update task, separate from the player tick"""
+    run_at_fixed_rate(UPDATE_SPECTATORS_INTERVAL, spectator_lane,
+                      movement.broadcast_spectator_states, sio, spectator_lane)
+
+def create_listener(port):
+    """Listening socket tuned for many long-lived websocket connections"""
+    listener = eventlet.listen(('', port), backlog=LISTEN_BACKLOG)
+    # Accepted sockets inherit these options
+    listener.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        listener.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE)
+    return listener
+
+def raise_file_limit():
+    """Every connection is a file descriptor, lift the soft limit to the hard one"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
         
 
 if __name__ == '__main__':
+    if recorder:
+        recorder.start()
+    
     # Start the room cleanup task in a background thread
     eventlet.spawn(start_cleanup_task)
     eventlet.spawn(start_update_players_task)
+    eventlet.spawn(start_update_spectators_task)
+    eventlet.spawn(start_lane_report_task)
+    
+    raise_file_limit()
     
-    port = 5000
-    print(f"Server starting on port {port}")
-    wsgi.server(eventlet.listen(('', port)), app) 
\ No newline at end of file
+    port = int(os.environ.get('PORT', 5000))
+    print(f"Server starting on port {port} "
+          f"(max {lobby.MAX_CONNECTIONS} connections, {lobby.MAX_ROOMS} rooms, pool {WSGI_POOL_SIZE})")
+    try:
+        wsgi.server(
+            create_listener(port),
+            app,
+            max_size=WSGI_POOL_SIZE,
+            keepalive=False,  # Websocket upgrades are the only HTTP requests served
+            socket_timeout=SOCKET_TIMEOUT,
+        )
+    finally:
+        # Flush queued room states and close the match files
+        if recorder:
+            recorder.stop() 
\ No newline at end of file
@@ -1,10 +1,18 @@
-from storage.game_states import players, rooms, active_room_names
+from socketio.exceptions import ConnectionRefusedError
+
+from storage.game_states import players, rooms, active_room_names, open_rooms, abandoned_rooms
+from storage.game_states import mark_room_started, unmark_room_started
 from models.Player import Player
 from models.Vec2 import Vec2
 from models.Room import Room
+from services.rate_limit import rate_limited_event, forget_connection
+import os
 import time
 
 MAX_PLAYERS = 8  # Maximum number of players in a room
+MAX_CONNECTIONS = int(os.environ.get('MAX_CONNECTIONS', 10000))  # Connected clients, players and spectators
+MAX_ROOMS = int(os.environ.get('MAX_ROOMS', 100000))  # Rooms existing at the same time
+SPECTATOR_ROOM_SUFFIX = '/spectators'  # Socket.IO room suffix for a room's watchers
 
 # Expanded player colors for more than 2 players
 player_colors = [
@@ -303,6 +311,15 @@ def generate_walls():
     print(f"Generated {len(walls)} labyrinth walls for {MAP_WIDTH}x{MAP_HEIGHT} map")
     return walls
 
+_shared_walls = None
+
+def get_shared_walls():
+    """The maze is the same for every room, so rooms share one read-only copy"""
+    global _shared_walls
+    if _shared_walls is None:
+        _shared_walls = tuple(generate_walls())
+    return _shared_walls
+
 def is_near_start(wall, start_pos, clearance):
     """Check if a wall is too close to a starting position"""
     start_x, start_y = start_pos
@@ -336,16 +353,71 @@ def is_near_start(wall, start_pos, clearance):
 def get_player_list(room):
     player_list = []
     for player_sid in room.get_players():
+        player = players.get(player_sid)
+        if player is None:
+            # Player disconnected mid-game and is no longer tracked
+            continue
         player_list.append({
             'id': player_sid,
-            'username': players[player_sid].username,
+            'username': player.username,
             'is_host': player_sid == room.get_hostSid()
         })
     return player_list
 
-def register_lobby_events(sio):
+def update_open_room(room_name, room):
+    """Keep the quick-join index in sync after a room fills, starts or empties"""
+    if room.is_game_started() or room.is_empty():
+        open_rooms.remove(room_name)
+    else:
+        open_rooms.update(room_name, MAX_PLAYERS - room.get_num_players())
+
+def delete_room(room_name, sio=None):
+    """Remove a room from every registry and detach its players and spectators"""
+    room = rooms.pop(room_name, None)
+    active_room_names.discard(room_name)
+    unmark_room_started(room_name)
+    open_rooms.remove(room_name)
+    abandoned_rooms.pop(room_name, None)
+    
+    if room is None:
+        return
+    if sio is not None:
+        # Players who left a started game are still in its Socket.IO room,
+        # which would hand them the traffic of a new room with the same name
+        for player_sid in room.get_players():
+            sio.leave_room(player_sid, room_name)
+    for spectator_sid in room.get_spectators():
+        if spectator_sid in players:
+            players[spectator_sid].spectating = None
+        if sio is not None:
+            sio.leave_room(spectator_sid, get_spectator_room(room_name))
+
+def reclaim_abandoned_room(sio=None):
+    """Delete the oldest started room nobody is playing in, False if there is none"""
+    if not abandoned_rooms:
+        return False
+    room_name = next(iter(abandoned_rooms))
+    delete_room(room_name, sio)
+    print(f"Reclaimed abandoned room: {room_name}")
+    return True
+
+def get_spectator_room(room_name):
+    """Socket.IO room that carries the shared spectator stream of a game room"""
+    return room_name + SPECTATOR_ROOM_SUFFIX
+
+def register_lobby_events(sio, lane=None):
+    limited_event = rate_limited_event(sio)
+
+    def lobby_event(handler):
+        """Register a rate limited handler that runs in the lobby lane"""
+        limited_event(lane.wrap(handler) if lane is not None else handler)
+        return handler
+
     @sio.event
     def connect(sid, environ):
+        # Reject before allocating anything for the connection
+        if len(players) >= MAX_CONNECTIONS:
+            raise ConnectionRefusedError('Server full')
         players[sid] = Player(sid, Vec2(0, 0))
 
     @sio.event
@@ -357,12 +429,16 @@ def register_lobby_events(sio):
         room_name = players[sid].room
         if room_name and room_name in rooms:
             # Handle as a leave_room action
-            leave_room(sid)
+            leave_room(sid, None)
+        
+        if players[sid].spectating:
+            stop_spectating(sid)
         
         # Clean up player data
         del players[sid]
+        forget_connection(sid)
 
-    @sio.event
+    @lobby_event
     def create_room(sid, data):
         room_name = data.get('room_name')
         username = data.get('username', f'Player {sid[:5]}')  # Get username or use default
@@ -370,13 +446,25 @@ def register_lobby_events(sio):
         if not room_name:
             return {'success': False, 'message': 'Room name is required'}
         
+        if room_name.endswith(SPECTATOR_ROOM_SUFFIX):
+            return {'success': False, 'message': 'Invalid room name'}
+        
         if room_name in active_room_names:
             return {'success': False, 'message': 'Room already exists'}
         
+        # Abandoned games never empty, so make room by reclaiming one of them
+        if len(rooms) >= MAX_ROOMS and not reclaim_abandoned_room(sio):
+            return {'success': False, 'message': 'Server full'}
+        
+        # A spectator that becomes a player must stop receiving the spectator stream
+        if players[sid].spectating:
+            stop_spectating(sid)
+        
         # Create new room with this player as first member and host
         sio.enter_room(sid, room_name)
-        rooms[room_name] = Room(generate_walls(), sid)
+        rooms[room_name] = Room(get_shared_walls(), sid)
         active_room_names.add(room_name)  # Add to active room names
+        update_open_room(room_name, rooms[room_name])
         
         position_index, color_index = 0, 0  # First player gets first position/color
         start_x, start_y = PLAYER_STARTS[position_index]
@@ -402,7 +490,55 @@ def register_lobby_events(sio):
             'game_started': False
         }
 
-    @sio.event
+    def seat_player(sid, room_name, room, username):
+        """Add a player to a room that has not started yet and build the join response"""
+        # A second seat would never be freed and keep its room open forever
+        if players[sid].room:
+            return {'success': False, 'message': 'Already in a room'}
+        
+        if room.get_num_players() >= MAX_PLAYERS:
+            return {'success': False, 'message': 'Room is full'}
+        
+        # A spectator that becomes a player must stop receiving the spectator stream
+        if players[sid].spectating:
+            stop_spectating(sid)
+        
+        player_list = get_player_list(room)
+        # Players take the lowest free slot, so a slot freed by a leaving
+        # player is reused instead of doubling up on a start position
+        position_index = room.get_free_seat()
+        start_x, start_y = PLAYER_STARTS[position_index]
+        players[sid].position = Vec2(start_x, start_y)
+        players[sid].color = player_colors[position_index]
+        players[sid].room = room_name
+        players[sid].username = username
+        room.add_player(sid)
+        update_open_room(room_name, room)
+        new_player_count = room.get_num_players()
+        
+        # Notify all players in the room that someone joined
+        sio.enter_room(sid, room_name)
+        sio.emit('player_joined', {
+            'player_list': player_list,
+        }, room=room_name)
+        
+        print(f"Player {username} (SID: {sid}) joined room '{room_name}' as position {position_index} with {new_player_count} total players")
+        
+        # Return success with room data
+        return {
+            'success': True, 
+            'message': 'Joined room', 
+            'color': player_colors[position_index],
+            'walls': room.get_walls(),
+            'x': start_x,
+            'y': start_y,
+            'position_index': position_index,
+            'is_host': False,
+            'player_list': player_list,
+            'game_started': False
+        }
+
+    @lobby_event
     def join_room(sid, data):
         room_name = data.get('room_name')
         username = data.get('username', f'Player {sid[:5]}')  # Get username or use default
@@ -418,47 +554,48 @@ def register_lobby_events(sio):
         if room.is_game_started() and not room.is_player_in_room(sid):
             return {'success': False, 'message': 'Game already started'}
         
-        player_list = get_player_list(room)
-        # Check if the game has already started
-        if room.is_game_started() and room.is_player_in_room(sid):
-            room.activate_player(sid)
-        elif not room.is_game_started():
-            # Add player to room
-            current_player_count = room.get_num_players()
-            if current_player_count >= MAX_PLAYERS:
-                return {'success': False, 'message': 'Room is full'}
-
-            start_x, start_y = PLAYER_STARTS[current_player_count]
-            players[sid].position = Vec2(start_x, start_y)
-            players[sid].color = player_colors[current_player_count]
-            players[sid].room = room_name
-            players[sid].username = username
-            room.add_player(sid)
-            new_player_count = current_player_count + 1
-            
-            # Notify all players in the room that someone joined
-            sio.enter_room(sid, room_name)
-            sio.emit('player_joined', {
-                'player_list': player_list,
-            }, room=room_name)
+        if not room.is_game_started():
+            return seat_player(sid, room_name, room, username)
         
-        print(f"Player {username} (SID: {sid}) joined room '{room_name}' as position {current_player_count} with {new_player_count} total players")
+        # Player is rejoining a game that has already started
+        if players[sid].room and players[sid].room != room_name:
+            return {'success': False, 'message': 'Already in a room'}
+        
+        if players[sid].spectating:
+            stop_spectating(sid)
+        room.activate_player(sid)
+        mark_room_started(room_name)  # Back in the tick if every player had left
+        abandoned_rooms.pop(room_name, None)
+        players[sid].room = room_name
+        print(f"Player {username} (SID: {sid}) rejoined room '{room_name}'")
         
-        # Return success with room data
         return {
             'success': True, 
-            'message': 'Joined room', 
-            'color': player_colors[current_player_count],
-            'walls': rooms[room_name].get_walls(),
-            'x': start_x,
-            'y': start_y,
-            'position_index': current_player_count,
-            'is_host': False,
-            'player_list': player_list,
-            'game_started': False
+            'message': 'Rejoined room', 
+            'color': players[sid].color,
+            'walls': room.get_walls(),
+            'x': players[sid].position.x,
+            'y': players[sid].position.y,
+            'position_index': room.get_seat(sid),
+            'is_host': sid == room.get_hostSid(),
+            'player_list': get_player_list(room),
+            'game_started': True
         }
 
-    @sio.event
+    @lobby_event
+    def quick_join(sid, data):
+        """Join the fullest open room without knowing its name"""
+        username = data.get('username', f'Player {sid[:5]}')  # Get username or use default
+        
+        room_name = open_rooms.find_room()
+        if room_name is None:
+            return {'success': False, 'message': 'No open rooms'}
+        
+        result = seat_player(sid, room_name, rooms[room_name], username)
+        result['room_name'] = room_name
+        return result
+
+    @lobby_event
     def leave_room(sid, data, callback=None):
         """Allow a player to leave a room with proper callback"""
         print(f"Player {sid} attempting to leave room")
@@ -513,14 +650,17 @@ def register_lobby_events(sio):
         players[sid].room = None
         if room.is_game_started():
             room.deactivate_player(sid)
+            # Nobody is playing any more, take the room out of the tick
+            if room.get_num_active_players() == 0:
+                unmark_room_started(room_name)
+                abandoned_rooms[room_name] = None
         else:
             room.remove_player(sid)
+            update_open_room(room_name, room)
             
             # If room is now empty, delete it and free the room name
             if room.get_num_players() == 0:
-                del rooms[room_name]
-                if room_name in active_room_names:
-                    active_room_names.remove(room_name)
+                delete_room(room_name, sio)
                 print(f"Room {room_name} deleted and name freed - no players left")
 
             player_list = get_player_list(room)
@@ -538,7 +678,7 @@ def register_lobby_events(sio):
             callback({'success': True, 'message': 'Left room'})
         return {'success': True, 'message': 'Left room'}
 
-    @sio.event
+    @lobby_event
     def start_game(sid, data, callback=None):
         """Start the game in a room with proper callback"""
         if sid not in players:
@@ -561,20 +701,74 @@ def register_lobby_events(sio):
         
         # Mark game as started
         room.start_game()
+        mark_room_started(room_name)
+        update_open_room(room_name, room)
         
         # Notify all players that the game is starting
         sio.emit('game_started', {
             'walls': room.get_walls(),
         }, room=room_name)
         
-        print(f"Game started in room {room_name} by host {players[sid]['username']}")
+        print(f"Game started in room {room_name} by host {players[sid].username}")
         
         # Send success response via callback
         if callback:
             callback({'success': True, 'message': 'Game started'})
         return {'success': True, 'message': 'Game started'}
 
-    @sio.event
+    @lobby_event
+    def spectate_room(sid, data):
+        """Watch a started game without taking a player slot"""
+        room_name = data.get('room_name')
+        
+        if not room_name:
+            return {'success': False, 'message': 'Room name is required'}
+        
+        if room_name not in active_room_names:
+            return {'success': False, 'message': 'Room does not exist'}
+        
+        room = rooms[room_name]
+        
+        if not room.is_game_started():
+            return {'success': False, 'message': 'Game not started'}
+        
+        if players[sid].room:
+            return {'success': False, 'message': 'Already in a room'}
+        
+        if players[sid].spectating:
+            stop_spectating(sid)
+        
+        # Spectators don't count toward MAX_PLAYERS and only receive the
+        # throttled spectator stream, never the per-tick player broadcast
+        room.add_spectator(sid)
+        players[sid].spectating = room_name
+        sio.enter_room(sid, get_spectator_room(room_name))
+        
+        print(f"Spectator {sid} is watching room '{room_name}' ({room.get_num_spectators()} spectators)")
+        
+        return {
+            'success': True,
+            'message': 'Spectating room',
+            'walls': room.get_walls(),
+            'player_list': get_player_list(room),
+            'game_started': True
+        }
+
+    @lobby_event
+    def stop_spectating(sid, data=None):
+        """Stop watching the room the spectator is attached to"""
+        if sid not in players or not players[sid].spectating:
+            return {'success': True, 'message': 'Not spectating'}
+        
+        room_name = players[sid].spectating
+        players[sid].spectating = None
+        if room_name in rooms:
+            rooms[room_name].remove_spectator(sid)
+        sio.leave_room(sid, get_spectator_room(room_name))
+        
+        return {'success': True, 'message': 'Stopped spectating'}
+
+    @lobby_event
     def list_rooms(sid):
         """List all available rooms that can be joined"""
         room_info = {}
@@ -585,22 +779,28 @@ def register_lobby_events(sio):
 
 
 # Function to clean up inactive rooms
-def cleanup_inactive_rooms():
-    """Clean up inactive rooms that have been empty for too long"""
+def cleanup_inactive_rooms(sio=None, lane=None):
+    """Clean up inactive rooms that have had no active players for too long
+
+    With a server and lane given, the sweep yields to other greenlets whenever
+    the lane's time slice runs out, so a large sweep never delays a tick.
+    """
     current_time = time.time()
+    slice_started_at = time.perf_counter()
     
-    # Find rooms that are empty and haven't been used for a while
-    rooms_to_clean = []
     for room_name in active_room_names.copy():
-        # Check if room is empty
-        if room_name in rooms and rooms[room_name].is_empty():
-            # Check if room has been inactive for too long
-            if (current_time - rooms[room_name].get_creation_time() > INACTIVE_ROOM_THRESHOLD):
-                rooms_to_clean.append(room_name)
-    
-    # Clean up each identified room
-    for room_name in rooms_to_clean:
-        if room_name in rooms:
-            del rooms[room_name]
-        active_room_names.remove(room_name)
-        print(f"Cleaned up inactive room: {room_name}")
+        if sio is not None and lane is not None and lane.slice_expired(slice_started_at):
+            sio.sleep(0)
+            slice_started_at = time.perf_counter()
+        
+        # Rooms can change while the sweep is yielding, so check and delete together
+        room = rooms.get(room_name)
+        if room is None:
+            continue
+        
+        # Clean up rooms nobody is playing in that haven't been used for a while,
+        # which includes started games every player has left
+        if (room.get_num_active_players() == 0
+                and current_time - room.get_creation_time() > INACTIVE_ROOM_THRESHOLD):
+            delete_room(room_name, sio)
+            print(f"Cleaned up inactive room: {room_name}")
@@ -1,7 +1,13 @@
+import time
+
+from socketio import packet
+
 from models.Vec2 import Vec2
 
 from storage.game_states import players, rooms
-from storage.game_states import active_room_names
+from storage.game_states import get_started_rooms_frame
+from services.lobby import get_spectator_room
+from services.rate_limit import rate_limited_event
 
 
 def get_room_game_state(room_name):
@@ -17,30 +23,72 @@ def get_room_game_state(room_name):
     #     del players[sid]
     
     game_state: dict[str, dict] = {}
-    for i, player_sid in enumerate(room.get_players()):
+    for i, player_sid in enumerate(room.get_seats()):
+        if player_sid is None:
+            continue
+        player = players.get(player_sid)
+        if player is None:
+            # Player disconnected mid-game and is no longer tracked
+            continue
         game_state[player_sid] = {
-            'x': players[player_sid].position.x,
-            'y': players[player_sid].position.y,
-            'color': players[player_sid].color,
+            'x': player.position.x,
+            'y': player.position.y,
+            'color': player.color,
             'position_index': i,  # Include position index
-            'username': players[player_sid].username,  # Include username
+            'username': player.username,  # Include username
             'is_host': player_sid == room.get_hostSid(),  # Include host status
-            'is_active': room.is_player_activated(player_sid),  # Include active status
+            'is_active': room.is_seat_activated(i),  # Include active status
         }
     
     return game_state
 
-def broadcast_games_state(sio):
-  for room_name in active_room_names:
-    if rooms[room_name].is_empty() or not rooms[room_name].is_game_started():
-        continue
-    
+def broadcast_games_state(sio, recorder=None, lane=None):
+  # Each room is built and emitted without yielding in between, so every room
+  # gets a consistent state; lobby writes run between rooms once the tick has
+  # used its time slice and show up in the rooms that are still to be sent
+  if recorder is not None:
+    recorder.advance_tick()
+  
+  slice_started_at = time.perf_counter()
+  for room_name in get_started_rooms_frame():
+    room = rooms.get(room_name)
+    if room is None or room.get_num_active_players() == 0:
+      continue
     game_state = get_room_game_state(room_name)
+    if recorder is not None:
+      recorder.record_room(room_name, room.get_creation_time(), game_state)
     sio.emit('game_state', game_state, room=room_name)
+    
+    if lane is not None and lane.slice_expired(slice_started_at):
+      sio.sleep(0)
+      slice_started_at = time.perf_counter()
+
+
+def emit_shared(sio, event, data, room, namespace='/'):
+  """Encode a packet once and send the same bytes to every client in a room"""
+  encoded_packet = sio.packet_class(
+    packet.EVENT, namespace=namespace, data=[event, data]).encode()
+  for _, eio_sid in list(sio.manager.get_participants(namespace, room)):
+    sio.eio.send(eio_sid, encoded_packet)
+
+def broadcast_spectator_states(sio, lane=None):
+  """Send the throttled spectator stream, one encode per watched room"""
+  slice_started_at = time.perf_counter()
+  for room_name in get_started_rooms_frame():
+    room = rooms.get(room_name)
+    if room is None or not room.has_spectators():
+      continue
+    emit_shared(sio, 'spectator_state', get_room_game_state(room_name), get_spectator_room(room_name))
+    
+    if lane is not None and lane.slice_expired(slice_started_at):
+      sio.sleep(0)
+      slice_started_at = time.perf_counter()
 
 
 def register_movement_events(sio):
-    @sio.event
+    limited_event = rate_limited_event(sio)
+
+    @limited_event
     def update_position(sid, data):
         """Update player position and velocity"""
         if sid not in players:
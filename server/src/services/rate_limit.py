@@ -0,0 +1,110 @@
+import functools
+import os
+import time
+
+from storage.game_states import players, rate_limit_buckets
+
+# Token buckets per connection and event: (tokens refilled per second, bucket size)
+RATE_LIMITS = {
+    'update_position': (240, 240),  # Sent every animation frame while moving
+    'ping': (2, 5),
+    'list_rooms': (2, 5),
+    'create_room': (0.5, 3),  # Allocates a room
+    'join_room': (2, 5),
+    'quick_join': (2, 5),
+    'leave_room': (2, 5),
+    'start_game': (1, 3),
+    'spectate_room': (2, 5),
+    'stop_spectating': (2, 5),
+}
+DEFAULT_RATE_LIMIT = (5, 10)
+
+MAX_VIOLATIONS = 300  # Dropped events per window before the connection is closed
+VIOLATION_WINDOW = 10  # Seconds
+
+RATE_LIMITED_RESPONSE = {'success': False, 'message': 'Rate limited'}
+# Events whose normal reply is not a success/message dict answer drops in their own shape
+RATE_LIMITED_RESPONSES = {
+    'list_rooms': {},  # A room name to player count mapping
+}
+
+# Offender counters, kept for the lifetime of the process
+rate_limit_stats = {'dropped_events': 0, 'disconnected_clients': 0}
+
+
+def parse_rate_limits(spec):
+    """Parse overrides such as 'create_room=0.2:2,ping=1:3'"""
+    limits = {}
+    for entry in spec.split(','):
+        if not entry.strip():
+            continue
+        event, limit = entry.split('=')
+        rate, burst = limit.split(':')
+        limits[event.strip()] = (float(rate), float(burst))
+    return limits
+
+RATE_LIMITS.update(parse_rate_limits(os.environ.get('RATE_LIMITS', '')))
+
+
+def consume_token(sid, event, rate, burst):
+    """Take one token from the connection's bucket for an event, False if it is empty"""
+    now = time.monotonic()
+    buckets = rate_limit_buckets.get(sid)
+    if buckets is None:
+        buckets = rate_limit_buckets[sid] = {}
+
+    bucket = buckets.get(event)
+    if bucket is None:
+        # [tokens, last refill time]
+        buckets[event] = [burst - 1, now]
+        return True
+
+    tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+    bucket[1] = now
+    if tokens < 1:
+        bucket[0] = tokens
+        return False
+    bucket[0] = tokens - 1
+    return True
+
+def record_violation(sid):
+    """Count a dropped event, True once the connection should be disconnected"""
+    rate_limit_stats['dropped_events'] += 1
+    now = time.monotonic()
+    buckets = rate_limit_buckets[sid]
+    violations = buckets.get(None)
+    if violations is None or now - violations[1] > VIOLATION_WINDOW:
+        # [violations in window, window start]
+        violations = buckets[None] = [0, now]
+    violations[0] += 1
+    return violations[0] > MAX_VIOLATIONS
+
+def forget_connection(sid):
+    rate_limit_buckets.pop(sid, None)
+
+
+def rate_limited_event(sio):
+    """Like sio.event, but the registered handler first spends a token from the
+    sender's bucket. The undecorated handler is returned so the server can still
+    call it internally without being limited."""
+    def register(handler):
+        event = handler.__name__
+        rate, burst = RATE_LIMITS.get(event, DEFAULT_RATE_LIMIT)
+        dropped_response = RATE_LIMITED_RESPONSES.get(event, RATE_LIMITED_RESPONSE)
+
+        @functools.wraps(handler)
+        def limited_handler(sid, *args, **kwargs):
+            if sid not in players:
+                # Connection is already being torn down
+                return dropped_response
+            if not consume_token(sid, event, rate, burst):
+                if record_violation(sid):
+                    print(f"Disconnecting {sid}: too many rate limited events")
+                    rate_limit_stats['disconnected_clients'] += 1
+                    sio.disconnect(sid)
+                return dropped_response
+            return handler(sid, *args, **kwargs)
+
+        sio.on(event, limited_handler)
+        return handler
+    return register
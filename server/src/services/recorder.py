@@ -0,0 +1,308 @@
+"""
+Match recorder
+
+Started rooms are recorded into one append-only file per match. Every frame
+is a record with a fixed binary header followed by a compact JSON payload:
+
+    kind (1 byte) | tick (uint32) | timestamp (float64) | payload length (uint32)
+
+Keyframes carry the full game state, deltas only the player fields that
+changed since the previous record plus the players that left. The tick loop
+only pushes each room's state onto a bounded queue as it sends it; diffing,
+encoding and disk writes happen on a background writer thread.
+"""
+
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import time
+
+MAGIC = b'LABREC1\n'  # File signature and format version
+RECORD_HEADER = struct.Struct('<BIdI')
+KEYFRAME = ord('K')
+DELTA = ord('D')
+
+KEYFRAME_INTERVAL = 60  # One keyframe per second of play at 60 FPS
+MAX_QUEUED_STATES = 60000  # Room states dropped, not waited for, beyond this backlog
+MAX_BATCH_SIZE = 4096  # Room states written between two flushes
+MATCH_IDLE_TIMEOUT = 60  # Close a match file after this many seconds without states
+
+
+def encode_payload(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def diff_game_states(previous, current):
+    """Return the per-player field changes and removed players between two states"""
+    changes = {}
+    for sid, fields in current.items():
+        previous_fields = previous.get(sid)
+        if previous_fields is None:
+            changes[sid] = fields
+            continue
+        changed = {key: value for key, value in fields.items() if previous_fields.get(key) != value}
+        if changed:
+            changes[sid] = changed
+    removed = [sid for sid in previous if sid not in current]
+    return changes, removed
+
+
+class _MatchFile:
+    def __init__(self, path, room_created_at, start_tick):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.path = path
+        self.room_created_at = room_created_at  # Tells matches of reused room names apart
+        self.start_tick = start_tick
+        self.last_state = None
+        self.last_keyframe_tick = None
+        self.last_write = time.time()
+
+    def write(self, tick, timestamp, game_state):
+        # Keyframes are spaced in ticks, unchanged ticks are never written
+        if self.last_state is None or tick - self.last_keyframe_tick >= KEYFRAME_INTERVAL:
+            kind, payload = KEYFRAME, game_state
+            self.last_keyframe_tick = tick
+        else:
+            changes, removed = diff_game_states(self.last_state, game_state)
+            if not changes and not removed:
+                return
+            kind, payload = DELTA, {'s': changes, 'r': removed}
+
+        data = encode_payload(payload)
+        self.file.write(RECORD_HEADER.pack(kind, tick - self.start_tick, timestamp, len(data)))
+        self.file.write(data)
+        self.last_state = game_state
+        self.last_write = time.time()
+
+
+class MatchRecorder:
+    """Records started rooms on a background thread without blocking the tick"""
+
+    def __init__(self, directory, max_queued_states=MAX_QUEUED_STATES):
+        self.__directory = directory
+        self.__queue = queue.Queue(maxsize=max_queued_states)
+        self.__thread = None
+        self.__tick = 0
+        self.__tick_time = None
+        self.__matches: dict[str, _MatchFile] = {}
+        self.__recorded_states = 0
+        self.__dropped_states = 0
+        self.__write_errors = 0
+
+    def start(self):
+        os.makedirs(self.__directory, exist_ok=True)
+        self.__thread = threading.Thread(target=self.__run, name='match-recorder', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Flush queued states and close every match file"""
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+    def advance_tick(self):
+        """Start a new tick, the room states recorded until the next call belong to it"""
+        self.__tick += 1
+        self.__tick_time = time.time()
+
+    def record_room(self, room_name, room_created_at, game_state):
+        """Queue a room's state for the current tick, dropping it if the writer is behind"""
+        try:
+            self.__queue.put_nowait((self.__tick, self.__tick_time, room_name, room_created_at, game_state))
+        except queue.Full:
+            self.__dropped_states += 1
+
+    def get_stats(self):
+        return {
+            'recorded_states': self.__recorded_states,
+            'dropped_states': self.__dropped_states,
+            'write_errors': self.__write_errors,
+            'queued_states': self.__queue.qsize(),
+            'open_matches': len(self.__matches),
+        }
+
+    def __run(self):
+        while True:
+            try:
+                item = self.__queue.get(timeout=1)
+            except queue.Empty:
+                self.__close_idle_matches()
+                continue
+
+            # Drain whatever else is queued so files are flushed once per batch
+            batch = [item]
+            while item is not None and len(batch) < MAX_BATCH_SIZE:
+                try:
+                    item = self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            for item in batch:
+                if item is None:
+                    self.__close_all_matches()
+                    return
+                self.__write_state(*item)
+
+            for room_name, match in list(self.__matches.items()):
+                try:
+                    match.file.flush()
+                except OSError as e:
+                    self.__fail_match(room_name, e)
+            self.__close_idle_matches()
+
+    def __write_state(self, tick, timestamp, room_name, room_created_at, game_state):
+        match = self.__matches.get(room_name)
+        if match is not None and match.room_created_at != room_created_at:
+            # The room was deleted and its name reused, which starts a new match
+            self.__close_match(room_name)
+            match = None
+        try:
+            if match is None:
+                match = _MatchFile(self.__get_match_path(room_name, room_created_at), room_created_at, tick)
+                self.__matches[room_name] = match
+                print(f"Recording room '{room_name}' to {match.path}")
+            match.write(tick, timestamp, game_state)
+        except OSError as e:
+            self.__fail_match(room_name, e)
+        self.__recorded_states += 1
+
+    def __fail_match(self, room_name, error):
+        """Close a match whose file failed, its next state starts a new file"""
+        self.__write_errors += 1
+        print(f"Recording of room '{room_name}' failed: {error}")
+        self.__close_match(room_name)
+
+    def __close_match(self, room_name):
+        match = self.__matches.pop(room_name, None)
+        if match is None:
+            return
+        try:
+            match.file.close()
+        except OSError as e:
+            self.__write_errors += 1
+            print(f"Closing the recording of room '{room_name}' failed: {e}")
+
+    def __get_match_path(self, room_name, room_created_at):
+        # A match reopened after a write error continues in the same file
+        safe_name = re.sub(r'[^A-Za-z0-9_-]', '_', room_name)[:64]
+        return os.path.join(self.__directory, f"{safe_name}-{int(room_created_at * 1000)}.rec")
+
+    def __close_idle_matches(self):
+        now = time.time()
+        for room_name in [name for name, match in self.__matches.items()
+                          if now - match.last_write > MATCH_IDLE_TIMEOUT]:
+            self.__close_match(room_name)
+
+    def __close_all_matches(self):
+        for room_name in list(self.__matches):
+            self.__close_match(room_name)
+
+
+class MatchReader:
+    """Streams frames back out of a match file and can seek to any tick"""
+
+    def __init__(self, path):
+        self.__file = open(path, 'rb')
+        if self.__file.read(len(MAGIC)) != MAGIC:
+            self.__file.close()
+            raise ValueError(f"{path} is not a match recording")
+        self.__state = {}
+        self.__keyframes = None  # (tick, offset) pairs, built on first seek
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def read_frame(self):
+        """Return the next (tick, timestamp, game_state), or None at the end of the recording"""
+        record = self.__read_record()
+        if record is None:
+            return None
+        kind, tick, timestamp, payload = record
+        self.__apply(kind, payload)
+        return tick, timestamp, self.__state
+
+    def seek(self, tick):
+        """Position the reader so that the next frame read is the first one at or after tick"""
+        if self.__keyframes is None:
+            self.__keyframes = self.__index_keyframes()
+
+        offset = len(MAGIC)
+        for keyframe_tick, keyframe_offset in self.__keyframes:
+            if keyframe_tick > tick:
+                break
+            offset = keyframe_offset
+
+        self.__file.seek(offset)
+        self.__state = {}
+        while True:
+            position = self.__file.tell()
+            record = self.__read_record()
+            if record is None or record[1] >= tick:
+                self.__file.seek(position)
+                return
+            self.__apply(record[0], record[3])
+
+    def __index_keyframes(self):
+        keyframes = []
+        self.__file.seek(len(MAGIC))
+        while True:
+            offset = self.__file.tell()
+            header = self.__read_header()
+            if header is None:
+                return keyframes
+            kind, tick, _, length = header
+            if kind == KEYFRAME:
+                keyframes.append((tick, offset))
+            self.__file.seek(length, os.SEEK_CUR)
+
+    def __read_header(self):
+        header = self.__file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            # End of file, or a record the writer has not finished yet
+            return None
+        return RECORD_HEADER.unpack(header)
+
+    def __read_record(self):
+        position = self.__file.tell()
+        header = self.__read_header()
+        if header is None:
+            self.__file.seek(position)
+            return None
+        kind, tick, timestamp, length = header
+        data = self.__file.read(length)
+        if len(data) < length:
+            self.__file.seek(position)
+            return None
+        return kind, tick, timestamp, json.loads(data)
+
+    def __apply(self, kind, payload):
+        # Frames already handed out are never mutated, each one gets new dicts
+        if kind == KEYFRAME:
+            self.__state = payload
+            return
+        state = dict(self.__state)
+        for sid, changed in payload['s'].items():
+            state[sid] = {**state.get(sid, {}), **changed}
+        for sid in payload['r']:
+            state.pop(sid, None)
+        self.__state = state
@@ -0,0 +1,90 @@
+"""
+Scheduling lanes
+
+The tick loop, lobby RPCs and housekeeping all share one eventlet hub, which
+has no priorities. Each kind of work runs in a lane instead: a lane tells
+long jobs when to yield the hub so other lanes get a turn, and keeps latency
+statistics against its budget.
+
+Job times are service times: they start when the job starts running, not
+when it became due, so time spent waiting for the hub behind another lane is
+not part of them. Periodic jobs also report their lateness, how long after
+their scheduled time they actually started.
+"""
+
+import functools
+import time
+
+
+class Lane:
+    def __init__(self, name, budget, time_slice=None):
+        self.name = name
+        self.budget = budget  # Seconds a job may run, waiting for the hub excluded
+        self.time_slice = time_slice  # Seconds a job may hold the hub between yields
+        self.reset_stats()
+
+    def run(self, fn, *args, **kwargs):
+        """Run a job in this lane and record how long it took"""
+        started_at = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.__record(time.perf_counter() - started_at)
+
+    def wrap(self, handler):
+        """Return a handler that runs every call in this lane"""
+        @functools.wraps(handler)
+        def lane_handler(*args, **kwargs):
+            return self.run(handler, *args, **kwargs)
+        return lane_handler
+
+    def slice_expired(self, slice_started_at):
+        """True once a job has held the hub for longer than the lane's time slice"""
+        return self.time_slice is not None and time.perf_counter() - slice_started_at > self.time_slice
+
+    def record_lateness(self, lateness):
+        """Record how many seconds after its scheduled time a periodic job started"""
+        self.__late_jobs += 1
+        self.__total_lateness += lateness
+        self.__max_lateness = max(self.__max_lateness, lateness)
+
+    def __record(self, elapsed):
+        self.__jobs += 1
+        self.__total_time += elapsed
+        self.__max_time = max(self.__max_time, elapsed)
+        if elapsed > self.budget:
+            self.__over_budget += 1
+
+    def reset_stats(self):
+        self.__jobs = 0
+        self.__total_time = 0.0
+        self.__max_time = 0.0
+        self.__over_budget = 0
+        self.__late_jobs = 0
+        self.__total_lateness = 0.0
+        self.__max_lateness = 0.0
+
+    def get_stats(self):
+        return {
+            'jobs': self.__jobs,
+            'avg_ms': self.__total_time / self.__jobs * 1000 if self.__jobs else 0.0,
+            'max_ms': self.__max_time * 1000,
+            'budget_ms': self.budget * 1000,
+            'over_budget': self.__over_budget,
+            'scheduled_jobs': self.__late_jobs,
+            'avg_late_ms': self.__total_lateness / self.__late_jobs * 1000 if self.__late_jobs else 0.0,
+            'max_late_ms': self.__max_lateness * 1000,
+        }
+
+
+def report_lanes(lanes):
+    """Print each lane's statistics since the previous report and start a new window"""
+    for lane in lanes:
+        stats = lane.get_stats()
+        lateness = ''
+        if stats['scheduled_jobs']:
+            lateness = f", started late by avg {stats['avg_late_ms']:.2f}ms, max {stats['max_late_ms']:.2f}ms"
+        print(f"Lane {lane.name}: {stats['jobs']} jobs, avg {stats['avg_ms']:.2f}ms, "
+              f"max {stats['max_ms']:.2f}ms, {stats['over_budget']} over the {stats['budget_ms']:.0f}ms budget"
+              f"{lateness}")
+        lane.reset_stats()
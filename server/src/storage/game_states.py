@@ -1,8 +1,40 @@
-
 from models.Player import Player
 from models.Room import Room
+from models.OpenRoomIndex import OpenRoomIndex
 
 # Game state
 players: dict[str, Player] = {}         # Store player data by SID
 rooms: dict[str, Room] = {}           # Store players in each room
 active_room_names = set()  # Track all active room names for proper cleanup
+open_rooms = OpenRoomIndex()  # Rooms that are not started and have free slots
+abandoned_rooms: dict[str, None] = {}  # Started rooms without active players, oldest first
+rate_limit_buckets: dict[str, dict] = {}  # Token buckets per SID and event
+
+# Started rooms are double-buffered: writers mutate the back buffer between
+# greenlet switches, the tick loop only ever iterates an immutable front copy
+started_room_names = set()  # Back buffer, written by the lobby
+_started_rooms_frame: tuple = ()  # Front buffer, read by the tick loop
+_started_rooms_changed = False
+
+
+def mark_room_started(room_name: str):
+  if room_name not in started_room_names:
+    started_room_names.add(room_name)
+    _publish_started_rooms()
+
+def unmark_room_started(room_name: str):
+  if room_name in started_room_names:
+    started_room_names.discard(room_name)
+    _publish_started_rooms()
+
+def _publish_started_rooms():
+  global _started_rooms_changed
+  _started_rooms_changed = True
+
+def get_started_rooms_frame():
+  """Return an immutable snapshot of started room names, copied only after a write"""
+  global _started_rooms_frame, _started_rooms_changed
+  if _started_rooms_changed:
+    _started_rooms_frame = tuple(started_room_names)
+    _started_rooms_changed = False
+  return _started_rooms_frame
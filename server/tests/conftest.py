@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from stub_server import StubServer, reset_game_states
+from services import lobby, movement
+
+
+@pytest.fixture
+def sio():
+    """Stub server with the lobby and movement handlers registered on clean state"""
+    reset_game_states()
+    server = StubServer(track_rooms=True)
+    lobby.register_lobby_events(server)
+    movement.register_movement_events(server)
+    yield server
+    reset_game_states()
+
+
+@pytest.fixture
+def started_room(sio):
+    """Room 'r' with players a, b and c, started by a"""
+    for sid in ('a', 'b', 'c', 'watcher'):
+        sio.handlers['connect'](sid, {})
+    sio.handlers['create_room']('a', {'room_name': 'r', 'username': 'a'})
+    sio.handlers['join_room']('b', {'room_name': 'r', 'username': 'b'})
+    sio.handlers['join_room']('c', {'room_name': 'r', 'username': 'c'})
+    sio.handlers['start_game']('a', {})
+    return 'r'
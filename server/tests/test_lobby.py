@@ -0,0 +1,171 @@
+import pytest
+from socketio.exceptions import ConnectionRefusedError
+
+from stub_server import StubServer, reset_game_states
+from services import lobby
+from services.scheduling import Lane
+from storage.game_states import players, rooms, abandoned_rooms, open_rooms
+
+
+def test_spectate_room_after_player_disconnected(sio, started_room):
+    sio.handlers['disconnect']('c')
+
+    result = sio.handlers['spectate_room']('watcher', {'room_name': started_room})
+
+    assert result['success']
+    assert [player['id'] for player in result['player_list']] == ['a', 'b']
+
+
+def test_rejoin_started_room_after_other_player_disconnected(sio, started_room):
+    sio.handlers['leave_room']('b', {})
+    sio.handlers['disconnect']('c')
+
+    result = sio.handlers['join_room']('b', {'room_name': started_room, 'username': 'b'})
+
+    assert result['success']
+    assert result['message'] == 'Rejoined room'
+    assert result['position_index'] == 1
+    assert [player['id'] for player in result['player_list']] == ['a', 'b']
+
+
+def test_spectator_stops_spectating_when_seated(sio, started_room):
+    sio.handlers['spectate_room']('watcher', {'room_name': started_room})
+
+    result = sio.handlers['create_room']('watcher', {'room_name': 'other'})
+
+    assert result['success']
+    assert players['watcher'].spectating is None
+    assert not rooms[started_room].has_spectators()
+
+
+def test_spectator_stops_spectating_when_rejoining(sio, started_room):
+    sio.handlers['leave_room']('b', {})
+    sio.handlers['spectate_room']('b', {'room_name': started_room})
+
+    result = sio.handlers['join_room']('b', {'room_name': started_room, 'username': 'b'})
+
+    assert result['message'] == 'Rejoined room'
+    assert players['b'].spectating is None
+    assert not rooms[started_room].has_spectators()
+
+
+def test_spectator_stops_spectating_on_quick_join(sio, started_room):
+    sio.handlers['connect']('host', {})
+    sio.handlers['create_room']('host', {'room_name': 'open'})
+    sio.handlers['spectate_room']('watcher', {'room_name': started_room})
+
+    result = sio.handlers['quick_join']('watcher', {})
+
+    assert result['room_name'] == 'open'
+    assert players['watcher'].spectating is None
+    assert not rooms[started_room].has_spectators()
+
+
+def test_join_room_twice_keeps_one_seat(sio, started_room):
+    sio.handlers['create_room']('watcher', {'room_name': 'open'})
+    sio.handlers['connect']('d', {})
+    sio.handlers['join_room']('d', {'room_name': 'open'})
+
+    result = sio.handlers['join_room']('d', {'room_name': 'open'})
+
+    assert result == {'success': False, 'message': 'Already in a room'}
+    assert rooms['open'].get_seats() == ['watcher', 'd']
+
+
+def test_join_room_from_another_lobby_leaves_no_ghost_seat(sio):
+    for sid in ('a', 'b'):
+        sio.handlers['connect'](sid, {})
+    sio.handlers['create_room']('a', {'room_name': 'first'})
+    sio.handlers['create_room']('b', {'room_name': 'second'})
+
+    result = sio.handlers['join_room']('a', {'room_name': 'second'})
+    sio.handlers['leave_room']('a', {})
+
+    assert not result['success']
+    assert rooms['second'].get_seats() == ['b']
+    assert 'first' not in rooms
+
+
+def test_open_room_index_follows_leave_start_and_delete(sio):
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['connect'](sid, {})
+    sio.handlers['create_room']('a', {'room_name': 'old'})
+    sio.handlers['create_room']('b', {'room_name': 'new'})
+    sio.handlers['join_room']('c', {'room_name': 'new'})
+    assert open_rooms.find_room() == 'new'
+
+    sio.handlers['leave_room']('c', {})
+    assert open_rooms.find_room() == 'old'
+
+    sio.handlers['start_game']('a', {})
+    assert open_rooms.find_room() == 'new'
+
+    sio.handlers['leave_room']('b', {})
+    assert 'new' not in rooms
+    assert open_rooms.find_room() is None
+
+
+def test_cleanup_reclaims_abandoned_started_room(sio, started_room, monkeypatch):
+    monkeypatch.setattr(lobby, 'INACTIVE_ROOM_THRESHOLD', -1)
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['disconnect'](sid)
+
+    lobby.cleanup_inactive_rooms()
+
+    assert started_room not in rooms
+    assert not abandoned_rooms
+
+
+def test_reused_room_name_reaches_only_the_new_room(sio, started_room, monkeypatch):
+    monkeypatch.setattr(lobby, 'INACTIVE_ROOM_THRESHOLD', -1)
+    # Players that left stay connected and must not get the new room's traffic
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['leave_room'](sid, {})
+    lobby.cleanup_inactive_rooms(sio)
+
+    result = sio.handlers['create_room']('watcher', {'room_name': started_room})
+
+    assert result['success']
+    assert sio.room_members[started_room] == {'watcher'}
+
+
+def test_create_room_at_capacity_reclaims_abandoned_room(sio, started_room, monkeypatch):
+    monkeypatch.setattr(lobby, 'MAX_ROOMS', 1)
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['disconnect'](sid)
+
+    result = sio.handlers['create_room']('watcher', {'room_name': 'fresh'})
+
+    assert result['success']
+    assert list(rooms) == ['fresh']
+
+
+def test_create_room_at_capacity_without_abandoned_rooms(sio, started_room, monkeypatch):
+    monkeypatch.setattr(lobby, 'MAX_ROOMS', 1)
+
+    result = sio.handlers['create_room']('watcher', {'room_name': 'fresh'})
+
+    assert result == {'success': False, 'message': 'Server full'}
+
+
+def test_connect_refused_at_max_connections(sio, monkeypatch):
+    monkeypatch.setattr(lobby, 'MAX_CONNECTIONS', 1)
+    sio.handlers['connect']('a', {})
+
+    with pytest.raises(ConnectionRefusedError, match='Server full'):
+        sio.handlers['connect']('b', {})
+    assert list(players) == ['a']
+
+
+def test_lobby_events_run_in_the_lobby_lane():
+    reset_game_states()
+    server = StubServer()
+    lane = Lane('lobby', budget=1)
+    lobby.register_lobby_events(server, lane)
+    server.handlers['connect']('a', {})
+
+    server.handlers['list_rooms']('a')
+    server.handlers['create_room']('a', {'room_name': 'r', 'username': 'a'})
+
+    assert lane.get_stats()['jobs'] == 2
+    reset_game_states()
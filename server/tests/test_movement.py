@@ -0,0 +1,40 @@
+from services import movement
+from services.scheduling import Lane
+from storage.game_states import get_started_rooms_frame
+
+
+def broadcast(sio, lane=None):
+    """Run one tick and return the rooms it sent a game state to"""
+    emitted_rooms = []
+    sio.emit = lambda event, data=None, room=None: emitted_rooms.append(room)
+    movement.broadcast_games_state(sio, lane=lane)
+    return emitted_rooms
+
+
+def test_abandoned_started_room_leaves_the_tick(sio, started_room):
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['disconnect'](sid)
+
+    assert started_room not in get_started_rooms_frame()
+    assert broadcast(sio) == []
+
+
+def test_rejoined_room_returns_to_the_tick(sio, started_room):
+    for sid in ('a', 'b', 'c'):
+        sio.handlers['leave_room'](sid, {})
+    sio.handlers['join_room']('a', {'room_name': started_room})
+
+    assert broadcast(sio) == [started_room]
+
+
+def test_tick_yields_between_rooms_and_sees_later_lobby_writes(sio, started_room):
+    sio.handlers['connect']('d', {})
+    sio.handlers['create_room']('d', {'room_name': 's', 'username': 'd'})
+    sio.handlers['start_game']('d', {})
+    first_room, second_room = get_started_rooms_frame()
+
+    # Lobby RPCs that run while the tick yields after the first room
+    room_players = {started_room: ('a', 'b', 'c'), 's': ('d',)}
+    sio.sleep = lambda seconds=0: [sio.handlers['disconnect'](sid) for sid in room_players[second_room]]
+
+    assert broadcast(sio, Lane('tick', budget=1, time_slice=0)) == [first_room]
@@ -0,0 +1,30 @@
+from models.OpenRoomIndex import OpenRoomIndex
+
+
+def test_fullest_room_first_then_oldest():
+    index = OpenRoomIndex()
+    index.update('old', 3)
+    index.update('new', 3)
+    assert index.find_room() == 'old'
+
+    index.update('fuller', 1)
+    assert index.find_room() == 'fuller'
+
+
+def test_full_and_removed_rooms_are_not_found():
+    index = OpenRoomIndex()
+    index.update('full', 0)
+    index.update('gone', 2)
+    index.remove('gone')
+    index.remove('never-added')
+
+    assert index.find_room() is None
+
+
+def test_update_moves_a_room_between_buckets():
+    index = OpenRoomIndex()
+    index.update('a', 2)
+    index.update('b', 3)
+    index.update('a', 4)
+
+    assert index.find_room() == 'b'
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import rate_limit
+from services.rate_limit import RATE_LIMITS, MAX_VIOLATIONS, parse_rate_limits
+from storage.game_states import players, rate_limit_buckets
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen monotonic clock for the limiter, advanced by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_burst_is_cut_off_after_bucket_size(sio, clock):
+    sio.handlers['connect']('a', {})
+    _, burst = RATE_LIMITS['join_room']
+
+    results = [sio.handlers['join_room']('a', {}) for _ in range(int(burst) + 1)]
+
+    assert all(result['message'] == 'Room name is required' for result in results[:-1])
+    assert results[-1] == rate_limit.RATE_LIMITED_RESPONSE
+
+
+def test_list_rooms_drops_keep_the_reply_shape(sio, clock):
+    sio.handlers['connect']('a', {})
+    _, burst = RATE_LIMITS['list_rooms']
+    for _ in range(int(burst)):
+        sio.handlers['list_rooms']('a')
+
+    assert sio.handlers['list_rooms']('a') == {}
+
+
+def test_tokens_refill_over_time(sio, clock):
+    sio.handlers['connect']('a', {})
+    rate, burst = RATE_LIMITS['list_rooms']
+    for _ in range(int(burst) + 1):
+        sio.handlers['list_rooms']('a')
+
+    clock[0] += 1 / rate
+    assert rate_limit.consume_token('a', 'list_rooms', rate, burst)
+    assert not rate_limit.consume_token('a', 'list_rooms', rate, burst)
+
+
+def test_flooding_client_is_disconnected_and_forgotten(sio, clock):
+    sio.handlers['connect']('a', {})
+    _, burst = RATE_LIMITS['list_rooms']
+    disconnected_clients = rate_limit.rate_limit_stats['disconnected_clients']
+
+    for _ in range(int(burst) + MAX_VIOLATIONS):
+        sio.handlers['list_rooms']('a')
+    assert 'a' in players
+
+    sio.handlers['list_rooms']('a')
+    assert 'a' not in players
+    assert 'a' not in rate_limit_buckets
+    assert rate_limit.rate_limit_stats['disconnected_clients'] == disconnected_clients + 1
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits('create_room=0.2:2, ping=1:3,') == {
+        'create_room': (0.2, 2.0),
+        'ping': (1.0, 3.0),
+    }
+
+
+def test_rate_limits_env_overrides_defaults():
+    # The overrides are read at import, so check them in a fresh interpreter
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    script = "from services.rate_limit import RATE_LIMITS; print(RATE_LIMITS['ping']); print(RATE_LIMITS['join_room'])"
+    output = subprocess.run([sys.executable, '-c', script], cwd=src, env={**os.environ, 'RATE_LIMITS': 'ping=1:3'},
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.splitlines() == ['(1.0, 3.0)', str(RATE_LIMITS['join_room'])]
@@ -0,0 +1,73 @@
+import os
+
+from services import recorder
+from services.recorder import MatchRecorder, MatchReader, KEYFRAME_INTERVAL
+
+
+def record(directory, states, room_created_at=1.0):
+    match_recorder = MatchRecorder(str(directory))
+    match_recorder.start()
+    for state in states:
+        match_recorder.advance_tick()
+        match_recorder.record_room('room', room_created_at, state)
+    match_recorder.stop()
+    return match_recorder
+
+
+def test_round_trip_and_seek(tmp_path):
+    states = [{'a': {'x': tick, 'y': 0}} for tick in range(3 * KEYFRAME_INTERVAL)]
+    record(tmp_path, states)
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+
+    with MatchReader(path) as reader:
+        assert [state for _, _, state in reader] == states
+        reader.seek(KEYFRAME_INTERVAL + 5)
+        tick, _, state = reader.read_frame()
+        assert tick == KEYFRAME_INTERVAL + 5
+        assert state == states[tick]
+
+
+def test_keyframes_are_spaced_in_ticks_not_records(tmp_path):
+    # Only every tenth tick changes, so few records are written
+    states = [{'a': {'x': tick // 10}} for tick in range(4 * KEYFRAME_INTERVAL)]
+    record(tmp_path, states)
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+
+    with open(path, 'rb') as f:
+        data = f.read()[len(recorder.MAGIC):]
+    keyframe_ticks = []
+    while data:
+        kind, tick, _, length = recorder.RECORD_HEADER.unpack_from(data)
+        if kind == recorder.KEYFRAME:
+            keyframe_ticks.append(tick)
+        data = data[recorder.RECORD_HEADER.size + length:]
+    assert keyframe_ticks == [0, 60, 120, 180]
+
+
+def test_reused_room_name_starts_a_new_match(tmp_path):
+    match_recorder = MatchRecorder(str(tmp_path))
+    match_recorder.start()
+    for room_created_at, x in ((1.0, 1), (1.0, 2), (2.0, 3)):
+        match_recorder.advance_tick()
+        match_recorder.record_room('room', room_created_at, {'a': {'x': x}})
+    match_recorder.stop()
+
+    paths = sorted(os.path.join(tmp_path, name) for name in os.listdir(tmp_path))
+    assert len(paths) == 2
+    with MatchReader(paths[1]) as reader:
+        assert [(tick, state) for tick, _, state in reader] == [(0, {'a': {'x': 3}})]
+
+
+def test_write_error_closes_match_and_keeps_writer_alive(tmp_path, monkeypatch):
+    match_recorder = MatchRecorder(str(tmp_path / 'missing'))
+    # Never created, so opening a match file fails
+    monkeypatch.setattr(os, 'makedirs', lambda *args, **kwargs: None)
+    match_recorder.start()
+    match_recorder.advance_tick()
+    match_recorder.record_room('room', 1.0, {'a': {'x': 1}})
+    match_recorder.stop()
+
+    stats = match_recorder.get_stats()
+    assert stats['write_errors'] == 1
+    assert stats['recorded_states'] == 1
+    assert stats['open_matches'] == 0
@@ -0,0 +1,57 @@
+from models.Room import Room
+
+
+def make_room(*sids):
+    room = Room([], sids[0])
+    for sid in sids[1:]:
+        room.add_player(sid)
+    return room
+
+
+def test_freed_seat_is_reused():
+    room = make_room('a', 'b', 'c')
+    room.remove_player('b')
+
+    assert room.get_seats() == ['a', None, 'c']
+    assert room.add_player('d') == 1
+    assert room.get_seats() == ['a', 'd', 'c']
+    assert room.get_free_seat() == 3
+
+
+def test_trailing_free_seats_are_trimmed():
+    room = make_room('a', 'b', 'c')
+    room.remove_player('b')
+    room.remove_player('c')
+
+    assert room.get_seats() == ['a']
+    assert room.add_player('d') == 1
+
+
+def test_host_handoff_skips_inactive_players():
+    room = make_room('a', 'b', 'c')
+    room.deactivate_player('b')
+
+    room.remove_player('a')
+    assert room.get_hostSid() == 'c'
+
+    room.remove_player('c')
+    assert room.get_hostSid() is None
+    assert room.get_players() == ['b']
+
+
+def test_counters_follow_activation():
+    room = make_room('a', 'b', 'c')
+    room.deactivate_player('b')
+    room.deactivate_player('b')
+    assert (room.get_num_players(), room.get_num_active_players()) == (3, 2)
+    assert not room.is_seat_activated(1)
+
+    room.remove_player('b')
+    assert (room.get_num_players(), room.get_num_active_players()) == (2, 2)
+
+    room.deactivate_player('c')
+    room.activate_player('c')
+    room.activate_player('c')
+    room.remove_player('missing')
+    assert (room.get_num_players(), room.get_num_active_players()) == (2, 2)
+    assert room.is_seat_activated(2)
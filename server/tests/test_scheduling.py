@@ -0,0 +1,28 @@
+from services.scheduling import Lane, report_lanes
+
+
+def test_lateness_is_reported_apart_from_run_time(capsys):
+    lane = Lane('tick', budget=0.016)
+    lane.record_lateness(0.004)
+    lane.record_lateness(0.002)
+    lane.run(lambda: None)
+
+    stats = lane.get_stats()
+    assert stats['scheduled_jobs'] == 2
+    assert stats['avg_late_ms'] == 3.0
+    assert stats['max_late_ms'] == 4.0
+    assert stats['max_ms'] < 4.0
+
+    report_lanes([lane])
+    assert 'started late by avg 3.00ms, max 4.00ms' in capsys.readouterr().out
+    assert lane.get_stats()['scheduled_jobs'] == 0
+
+
+def test_lane_without_a_schedule_reports_run_time_only(capsys):
+    lane = Lane('lobby', budget=0.05)
+    lane.wrap(lambda sid: sid)('a')
+
+    report_lanes([lane])
+    output = capsys.readouterr().out
+    assert 'Lane lobby: 1 jobs' in output
+    assert 'late' not in output
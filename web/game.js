@@ -128,7 +128,7 @@ console.log("Initializing UI elements:", {
 const socket = io(SERVER_URL, {
     // Recommended configuration options:
     secure: true, // Ensures HTTPS connection
-    // transports: ['websocket'], // Force WebSocket transport
+    transports: ['websocket'], // The server only accepts WebSocket connections
     rejectUnauthorized: true // Verify SSL certificate (default)
   });
 
@@ -164,6 +164,12 @@ socket.on('disconnect', () => {
     updatePingDisplay();
 });
 
+socket.on('connect_error', (error) => {
+    // The server refuses new connections with 'Server full' when at capacity
+    console.error("Connection refused:", error.message);
+    connectionStatus.textContent = `Status: ${error.message}`;
+});
+
 // Game state pushed from server
 socket.on('game_state', (data) => {
     console.log("Received game state update from server");